@@ -0,0 +1,16 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables once at import rather than on every fetcher construction
+load_dotenv(dotenv_path='/Users/Avi 1/Sentiment Analysis Project/.env')
+
+# API credentials, read right after the .env file is loaded
+ALPHA_VANTAGE_KEY = os.environ.get('ALPHA_VANTAGE_KEY')
+NEWS_API_KEY = os.environ.get('NEWS_API_KEY')
+REDDIT_CLIENT_ID = os.environ.get('REDDIT_CLIENT_ID')
+REDDIT_CLIENT_SECRET = os.environ.get('REDDIT_CLIENT_SECRET')
+REDDIT_USER_AGENT = os.environ.get('REDDIT_USER_AGENT')
+
+# FinBERT truncates to 512 tokens anyway, so longer article summaries and post bodies
+# are clipped at ingestion
+MAX_BODY_CHARS = 2000
@@ -0,0 +1,113 @@
+import os
+import time
+import functools
+import pandas as pd
+from datetime import datetime, timedelta
+from dateutil.tz import tzlocal
+
+# Cached results live next to the project, one pickle per (source, ticker, day)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+
+# The current day is still receiving new posts/articles, so it is only reused briefly
+TODAY_TTL_SECONDS = 600
+
+
+def _day_path(source: str, ticker: str, day) -> str:
+    return os.path.join(CACHE_DIR, source, ticker, f"{day.isoformat()}.pkl")
+
+
+def _load_day(path: str, day, today, needed_from: datetime):
+    """
+    Load a cached day if it can be reused, otherwise return None.
+
+    Each file stores the rows for one day together with the time they cover
+    from; the first day of a fetched window only covers the part after the
+    window's cutoff, so it cannot serve a later request with an earlier one.
+    """
+    if not os.path.exists(path):
+        return None
+
+    modified = os.path.getmtime(path)
+    if day == today:
+        if time.time() - modified >= TODAY_TTL_SECONDS:
+            return None
+    # Past days are complete only if they were written after the day ended
+    elif datetime.fromtimestamp(modified).date() <= day:
+        return None
+
+    entry = pd.read_pickle(path)
+    if not isinstance(entry, dict) or entry['covered_from'] > needed_from:
+        return None
+    return entry['rows']
+
+
+def local_timestamps(series: pd.Series, **to_datetime_kwargs) -> pd.Series:
+    """
+    Parse timestamps as naive local time so they compare with datetime.now().
+
+    Aware timestamps are converted with the local zone's rules at each instant,
+    so rows on the far side of a DST change keep their own UTC offset. Keyword
+    arguments are passed through to pd.to_datetime.
+    """
+    timestamps = pd.to_datetime(series, **to_datetime_kwargs)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert(tzlocal()).dt.tz_localize(None)
+    return timestamps
+
+
+def cached_by_day(source: str):
+    """
+    Cache a fetcher method's results on disk, bucketed by (ticker, day).
+
+    The wrapped method must take (ticker, days) and return a DataFrame with a
+    'timestamp' column. When every day in the lookback window is cached, the
+    result is served from disk; otherwise the window is fetched and each day
+    is written back. Empty results are not cached, since fetchers also return
+    an empty DataFrame on request errors.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, ticker: str, days: int = 7) -> pd.DataFrame:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days)
+            today = end_date.date()
+            window = [start_date.date() + timedelta(days=i) for i in range((today - start_date.date()).days + 1)]
+
+            # The first day is only needed from the cutoff onwards, the others from midnight
+            needed_from = {day: datetime.combine(day, datetime.min.time()) for day in window}
+            needed_from[window[0]] = start_date
+            paths = {day: _day_path(source, ticker, day) for day in window}
+
+            # Serve from disk if every day in the window is cached
+            try:
+                frames = [_load_day(paths[day], day, today, needed_from[day]) for day in window]
+                if all(frame is not None for frame in frames):
+                    print(f"Loaded {source} data for {ticker} from disk cache")
+                    frames = [frame for frame in frames if not frame.empty]
+                    if not frames:
+                        return pd.DataFrame()
+                    df = pd.concat(frames, ignore_index=True)
+                    timestamps = local_timestamps(df['timestamp'])
+                    return df[(timestamps >= start_date) & (timestamps <= end_date)].reset_index(drop=True)
+            except Exception as e:
+                print(f"Error reading {source} disk cache: {e}")
+
+            df = func(self, ticker, days)
+            if df.empty or 'timestamp' not in df.columns:
+                return df
+
+            # Write each day of the window back, including days with no results
+            try:
+                row_days = local_timestamps(df['timestamp']).dt.date
+                for day, path in paths.items():
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    pd.to_pickle({
+                        'covered_from': needed_from[day],
+                        'rows': df[(row_days == day).to_numpy()]
+                    }, path)
+            except Exception as e:
+                print(f"Error writing {source} disk cache: {e}")
+
+            return df
+        return wrapper
+    return decorator
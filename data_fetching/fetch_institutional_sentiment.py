@@ -1,20 +1,32 @@
 import requests
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 import os
-from dotenv import load_dotenv
-from sentiment_analysis.sentiment_analysis import SentimentAnalyzer
+from sentiment_analysis.sentiment_analysis import get_sentiment_analyzer
+from data_fetching.config import ALPHA_VANTAGE_KEY, NEWS_API_KEY, MAX_BODY_CHARS
+from data_fetching.disk_cache import cached_by_day, local_timestamps
 import time
 
 class InstitutionalSentimentFetcher:
+    # Company names used to widen News API queries
+    _COMPANIES = pd.Series({
+        "AAPL": "Apple",
+        "NVDA": "NVIDIA",
+        "MSFT": "Microsoft",
+        "TSLA": "Tesla",
+        "AMZN": "Amazon",
+        "GOOGL": "Google",
+        "META": "Meta",
+        "NFLX": "Netflix"
+    })
+    
+    # API keys
+    alpha_vantage_key = ALPHA_VANTAGE_KEY
+    news_api_key = NEWS_API_KEY
+    
     def __init__(self):
-        # Load environment variables from the correct path
-        load_dotenv(dotenv_path='/Users/Avi 1/Sentiment Analysis Project/.env')
-        
-        # Get API keys
-        self.alpha_vantage_key = os.environ.get('ALPHA_VANTAGE_KEY')
-        self.news_api_key = os.environ.get('NEWS_API_KEY')
-        
         # Set up request headers
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -26,9 +38,10 @@ class InstitutionalSentimentFetcher:
     def _get_sentiment_analyzer(self):
         """Lazy initialization of sentiment analyzer to avoid circular imports."""
         if self.sentiment_analyzer is None:
-            self.sentiment_analyzer = SentimentAnalyzer()
+            self.sentiment_analyzer = get_sentiment_analyzer()
         return self.sentiment_analyzer
     
+    @cached_by_day('alpha_vantage')
     def fetch_alpha_vantage_news(self, ticker: str, days: int = 7) -> pd.DataFrame:
         """Fetch news from Alpha Vantage API."""
         print(f"\n=== Alpha Vantage API Request ===")
@@ -51,7 +64,6 @@ class InstitutionalSentimentFetcher:
             # Make API request
             response = requests.get(url, headers=self.headers)
             print(f"Status Code: {response.status_code}")
-            print(f"Response Keys: {data.keys() if response.status_code == 200 else 'No data'}")
             
             # Check response status
             if response.status_code != 200:
@@ -61,32 +73,30 @@ class InstitutionalSentimentFetcher:
             
             # Parse response
             data = response.json()
+            print(f"Response Keys: {data.keys()}")
             
             # Check if feed exists in response
             if "feed" not in data:
                 print(f"No news feed found in Alpha Vantage response: {data.keys()}")
                 return pd.DataFrame()
             
-            # Process articles
-            articles = []
-            for item in data["feed"]:
-                try:
-                    # Parse timestamp
-                    timestamp = datetime.strptime(item["time_published"], "%Y%m%dT%H%M%S")
-                    
-                    # Check if article is within date range
-                    if start_date <= timestamp <= end_date:
-                        # Create article entry
-                        articles.append({
-                            'text': f"{item.get('title', '')} {item.get('summary', '')}",
-                            'timestamp': timestamp,
-                            'source': 'Financial News',
-                            'publisher': item.get('source', 'Unknown'),
-                            'url': item.get('url', '')
-                        })
-                except Exception as e:
-                    print(f"Error processing article: {e}")
-                    continue
+            # Parse all timestamps at once; malformed ones become NaT and are dropped
+            feed = data["feed"]
+            timestamps = pd.to_datetime(
+                [item.get("time_published") for item in feed],
+                format="%Y%m%dT%H%M%S",
+                errors="coerce"
+            )
+            in_range = (timestamps >= start_date) & (timestamps <= end_date)
+            
+            # Process articles within the date range
+            articles = [{
+                'text': f"{item.get('title', '')} {(item.get('summary') or '')[:MAX_BODY_CHARS]}",
+                'timestamp': timestamp,
+                'source': 'Financial News',
+                'publisher': item.get('source', 'Unknown'),
+                'url': item.get('url', '')
+            } for item, timestamp, keep in zip(feed, timestamps, in_range) if keep]
             
             print(f"Found {len(articles)} articles from Alpha Vantage")
             return pd.DataFrame(articles)
@@ -95,6 +105,7 @@ class InstitutionalSentimentFetcher:
             print(f"Error fetching Alpha Vantage news: {e}")
             return pd.DataFrame()
     
+    @cached_by_day('news_api')
     def fetch_news_api(self, ticker: str, days: int = 7) -> pd.DataFrame:
         print(f"\n=== News API Request ===")
         print(f"Ticker: {ticker}")
@@ -141,46 +152,48 @@ class InstitutionalSentimentFetcher:
             
             # Process articles
             news_data = [{
-                'text': f"{a.get('title', '')} {a.get('description', '')}",
-                'timestamp': pd.to_datetime(a.get('publishedAt')),
+                'text': f"{a.get('title', '')} {(a.get('description') or '')[:MAX_BODY_CHARS]}",
+                'timestamp': a.get('publishedAt'),
                 'source': 'Financial News',
                 'publisher': a.get('source', {}).get('name', 'Unknown'),
                 'url': a.get('url', '')
             } for a in articles]
             
-            return pd.DataFrame(news_data)
+            # Parse all timestamps at once into naive local time, matching the WSB posts
+            news_df = pd.DataFrame(news_data)
+            news_df['timestamp'] = local_timestamps(news_df['timestamp'], utc=True, errors='coerce')
+            return news_df
             
         except Exception as e:
             print(f"Error fetching News API data: {e}")
             return pd.DataFrame()
     
-    @staticmethod
-    def get_company_name(ticker: str) -> str:
+    @classmethod
+    def get_company_name(cls, ticker: str) -> str:
         """Get company name from ticker."""
-        companies = {
-            "AAPL": "Apple",
-            "NVDA": "NVIDIA",
-            "MSFT": "Microsoft",
-            "TSLA": "Tesla",
-            "AMZN": "Amazon",
-            "GOOGL": "Google",
-            "META": "Meta",
-            "NFLX": "Netflix"
-        }
-        return companies.get(ticker, ticker)
+        return cls._COMPANIES.get(ticker, ticker)
     
-    def get_institutional_sentiment(self, ticker: str, days: int = 7) -> pd.DataFrame:
-        """Fetch and combine institutional sentiment data from multiple sources."""
-        print(f"Fetching institutional sentiment for {ticker} over {days} days")
-        
-        # Try Alpha Vantage first
-        alpha_vantage_df = self.fetch_alpha_vantage_news(ticker, days)
-        
-        # If Alpha Vantage fails or returns no data, try News API as backup
-        news_api_df = pd.DataFrame()
-        if alpha_vantage_df.empty:
-            print("No data from Alpha Vantage, trying News API as backup")
-            news_api_df = self.fetch_news_api(ticker, days)
+    @classmethod
+    def get_company_names(cls, tickers: List[str]) -> pd.Series:
+        """
+        Get company names for several tickers at once, falling back to the ticker itself.
+        
+        Batch counterpart of get_company_name for callers that label whole columns of tickers.
+        """
+        names = cls._COMPANIES.reindex(tickers)
+        return names.where(names.notna(), pd.Series(tickers, index=names.index))
+    
+    def fetch_institutional_news(self, ticker: str, days: int = 7) -> pd.DataFrame:
+        """Fetch and combine news articles from all sources, without sentiment scores."""
+        print(f"Fetching institutional news for {ticker} over {days} days")
+        
+        # Query Alpha Vantage and News API concurrently; the requests spend nearly all their
+        # time waiting on the network, so threads overlap them despite the GIL
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            alpha_vantage_future = executor.submit(self.fetch_alpha_vantage_news, ticker, days)
+            news_api_future = executor.submit(self.fetch_news_api, ticker, days)
+            alpha_vantage_df = alpha_vantage_future.result()
+            news_api_df = news_api_future.result()
         
         # Combine results
         dfs = []
@@ -194,11 +207,20 @@ class InstitutionalSentimentFetcher:
             print("No institutional sentiment data available from any source")
             return pd.DataFrame()
         
-        # Combine all data
+        # Combine all data, dropping articles returned by both sources; articles without a url
+        # cannot be matched, so they are all kept
         combined_df = pd.concat(dfs, ignore_index=True)
+        duplicate = combined_df['url'].ne('') & combined_df.duplicated(subset=['url'])
+        combined_df = combined_df[~duplicate].reset_index(drop=True)
         
-        # Add ticker column
+        # Add ticker and company columns; the company name marks articles as relevant for analysis
         combined_df['ticker'] = ticker
+        combined_df['company'] = self.get_company_name(ticker)
+        return combined_df
+    
+    def get_institutional_sentiment(self, ticker: str, days: int = 7) -> pd.DataFrame:
+        """Fetch and combine institutional sentiment data from multiple sources."""
+        combined_df = self.fetch_institutional_news(ticker, days)
         
         # Apply sentiment analysis if data exists
         if not combined_df.empty and 'sentiment_score' not in combined_df.columns:
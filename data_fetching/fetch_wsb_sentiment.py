@@ -2,35 +2,36 @@ import praw
 import pandas as pd
 from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
+from data_fetching.config import (
+    REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT, MAX_BODY_CHARS
+)
+from data_fetching.disk_cache import cached_by_day, local_timestamps
 import time
 
 class WSBSentimentFetcher:
+    # Reddit API credentials
+    client_id = REDDIT_CLIENT_ID
+    client_secret = REDDIT_CLIENT_SECRET
+    user_agent = REDDIT_USER_AGENT
+    
     def __init__(self):
-        # Load environment variables
-        load_dotenv(dotenv_path='/Users/Avi 1/Sentiment Analysis Project/.env')
-        
-        # Get Reddit API credentials
-        client_id = os.environ.get('REDDIT_CLIENT_ID')
-        client_secret = os.environ.get('REDDIT_CLIENT_SECRET')
-        user_agent = os.environ.get('REDDIT_USER_AGENT')
-        
         # Validate credentials
-        if not all([client_id, client_secret, user_agent]):
+        if not all([self.client_id, self.client_secret, self.user_agent]):
             print("WARNING: Missing Reddit API credentials")
         
         # Initialize Reddit API client with error handling
         try:
             self.reddit = praw.Reddit(
-                client_id=client_id,
-                client_secret=client_secret,
-                user_agent=user_agent
+                client_id=self.client_id,
+                client_secret=self.client_secret,
+                user_agent=self.user_agent
             )
             print("Reddit API client initialized successfully")
         except Exception as e:
             print(f"Error initializing Reddit API client: {str(e)}")
             self.reddit = None
     
+    @cached_by_day('wsb')
     def fetch_wsb_posts(self, ticker: str, days: int = 7) -> pd.DataFrame:
         """Fetch posts from WallStreetBets subreddit related to a specific ticker."""
         print(f"Fetching WSB posts for {ticker} over the last {days} days")
@@ -54,7 +55,9 @@ class WSBSentimentFetcher:
                 return pd.DataFrame()
             
             # Search for posts containing the ticker
-            posts = []
+            raw_posts = []
+            posts = pd.DataFrame()
+            seen_ids = set()  # The same post is often returned by several time filters
             search_query = f"{ticker}"
             
             # Use multiple time filters to ensure we get enough posts
@@ -67,28 +70,17 @@ class WSBSentimentFetcher:
                     
                     for post in search_results:
                         try:
-                            post_date = datetime.fromtimestamp(post.created_utc)
-                            
-                            # Check if post is within the date range
-                            if start_date <= post_date <= end_date:
-                                # Check if the ticker is actually mentioned in the title or body
-                                title = post.title.upper()
-                                selftext = post.selftext.upper() if post.selftext else ""
-                                
-                                if ticker.upper() in title or ticker.upper() in selftext:
-                                    posts.append({
-                                        'text': f"{post.title} {post.selftext}",
-                                        'timestamp': post_date,
-                                        'score': post.score,
-                                        'num_comments': post.num_comments,
-                                        'url': f"https://www.reddit.com{post.permalink}",
-                                        'source': 'WallStreetBets',
-                                        'ticker': ticker
-                                    })
+                            if post.id in seen_ids:
+                                continue
+                            seen_ids.add(post.id)
+                            raw_posts.append(self._post_record(post, ticker))
                         except Exception as e:
                             print(f"Error processing post: {str(e)}")
                             continue
                     
+                    # Keep only posts in the date range that actually mention the ticker
+                    posts = self._filter_posts(raw_posts, ticker, start_date, end_date)
+                    
                     # If we found enough posts, break out of the loop
                     if len(posts) >= 50:
                         break
@@ -100,19 +92,59 @@ class WSBSentimentFetcher:
             print(f"Found {len(posts)} WSB posts for {ticker}")
             
             # If no posts found, try to fetch from hot/new/top
-            if not posts:
+            if posts.empty:
                 print("No posts found via search, trying hot/new/top posts")
-                self._fetch_from_listings(subreddit, ticker, start_date, end_date, posts)
+                listing_posts = []
+                self._fetch_from_listings(subreddit, ticker, listing_posts, seen_ids)
+                posts = self._filter_posts(listing_posts, ticker, start_date, end_date)
             
-            # Return results as DataFrame
-            return pd.DataFrame(posts)
+            return posts
             
         except Exception as e:
             print(f"Error fetching WSB posts: {str(e)}")
             return pd.DataFrame()
     
-    def _fetch_from_listings(self, subreddit, ticker: str, start_date, end_date, posts: list):
-        """Fetch posts from hot/new/top listings as a fallback method."""
+    @staticmethod
+    def _post_record(post, ticker: str) -> dict:
+        """Build the raw record for a post; title/selftext are kept for ticker filtering."""
+        selftext = post.selftext or ""
+        return {
+            'text': f"{post.title} {selftext[:MAX_BODY_CHARS]}",
+            'title': post.title,
+            'selftext': selftext,
+            'created_utc': post.created_utc,
+            'score': post.score,
+            'num_comments': post.num_comments,
+            'url': f"https://www.reddit.com{post.permalink}",
+            'source': 'WallStreetBets',
+            'ticker': ticker
+        }
+    
+    @staticmethod
+    def _filter_posts(posts: list, ticker: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Keep only posts within the date range whose title or body mentions the ticker."""
+        if not posts:
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(posts)
+        
+        # Convert all creation times at once to naive local time, matching datetime.now()
+        df['timestamp'] = local_timestamps(df['created_utc'], unit='s', utc=True)
+        
+        # One substring scan over title and body together instead of one scan per field
+        mentions = (df['title'] + '\n' + df['selftext']).str.contains(ticker, case=False, regex=False)
+        mask = (df['timestamp'] >= start_date) & (df['timestamp'] <= end_date) & mentions
+        return df[mask].drop(columns=['title', 'selftext', 'created_utc']).reset_index(drop=True)
+    
+    def _fetch_from_listings(self, subreddit, ticker: str, posts: list, seen_ids: set = None):
+        """Fetch posts from hot/new/top listings as a fallback method.
+
+        Appends raw records to ``posts``; callers filter them by date and ticker mentions.
+        Posts whose id is already in ``seen_ids`` are skipped.
+        """
+        if seen_ids is None:
+            seen_ids = set()
+        
         listings = [
             ('hot', subreddit.hot(limit=100)),
             ('new', subreddit.new(limit=100)),
@@ -124,24 +156,10 @@ class WSBSentimentFetcher:
                 print(f"Checking {listing_name} posts")
                 for post in listing:
                     try:
-                        post_date = datetime.fromtimestamp(post.created_utc)
-                        
-                        # Check if post is within the date range
-                        if start_date <= post_date <= end_date:
-                            # Check if the ticker is mentioned in the title or body
-                            title = post.title.upper()
-                            selftext = post.selftext.upper() if post.selftext else ""
-                            
-                            if ticker.upper() in title or ticker.upper() in selftext:
-                                posts.append({
-                                    'text': f"{post.title} {post.selftext}",
-                                    'timestamp': post_date,
-                                    'score': post.score,
-                                    'num_comments': post.num_comments,
-                                    'url': f"https://www.reddit.com{post.permalink}",
-                                    'source': 'WallStreetBets',
-                                    'ticker': ticker
-                                })
+                        if post.id in seen_ids:
+                            continue
+                        seen_ids.add(post.id)
+                        posts.append(self._post_record(post, ticker))
                     except Exception as e:
                         print(f"Error processing {listing_name} post: {str(e)}")
                         continue
@@ -1,8 +1,9 @@
 import streamlit as st
 from data_fetching.fetch_wsb_sentiment import WSBSentimentFetcher
 from data_fetching.fetch_institutional_sentiment import InstitutionalSentimentFetcher
-from sentiment_analysis.sentiment_analysis import SentimentAnalyzer
+from sentiment_analysis.sentiment_analysis import get_sentiment_analyzer
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
 # Import only the SentimentDashboard class, not the main function
@@ -17,11 +18,14 @@ def fetch_all_sentiment_data(ticker: str, days: int):
     # Initialize fetchers
     wsb_fetcher = WSBSentimentFetcher()
     institutional_fetcher = InstitutionalSentimentFetcher()
-    sentiment_analyzer = SentimentAnalyzer()
+    sentiment_analyzer = get_sentiment_analyzer()
     
-    # Fetch data from all sources
-    wsb_df = wsb_fetcher.fetch_wsb_posts(ticker, days)
-    institutional_df = institutional_fetcher.get_institutional_sentiment(ticker, days)
+    # Fetch data from all sources concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        wsb_future = executor.submit(wsb_fetcher.fetch_wsb_posts, ticker, days)
+        institutional_future = executor.submit(institutional_fetcher.get_institutional_sentiment, ticker, days)
+        wsb_df = wsb_future.result()
+        institutional_df = institutional_future.result()
     
     # Debug prints
     print(f"WSB data: {len(wsb_df)} rows")
@@ -33,8 +37,8 @@ def fetch_all_sentiment_data(ticker: str, days: int):
         if 'positive' not in wsb_df.columns:
             wsb_df = sentiment_analyzer.analyze_dataframe(wsb_df)
         wsb_df['source'] = 'WallStreetBets'
-        # Create a fresh DataFrame to avoid index issues
-        wsb_df = pd.DataFrame(wsb_df.to_dict('records'))
+        # Reset the index to avoid index issues
+        wsb_df = wsb_df.reset_index(drop=True)
     
     if not institutional_df.empty:
         # Ensure institutional data has sentiment scores
@@ -43,15 +47,15 @@ def fetch_all_sentiment_data(ticker: str, days: int):
         # Make sure source is set
         if 'source' not in institutional_df.columns:
             institutional_df['source'] = 'Financial News'
-        # Create a fresh DataFrame to avoid index issues
-        institutional_df = pd.DataFrame(institutional_df.to_dict('records'))
+        # Reset the index to avoid index issues
+        institutional_df = institutional_df.reset_index(drop=True)
     
     # Combine all data with a more robust approach
     combined_df = pd.DataFrame()
     
     if not wsb_df.empty and not institutional_df.empty:
         # Ensure columns match before concatenation
-        common_cols = list(set(wsb_df.columns) & set(institutional_df.columns))
+        common_cols = wsb_df.columns.intersection(institutional_df.columns)
         wsb_df = wsb_df[common_cols]
         institutional_df = institutional_df[common_cols]
         combined_df = pd.concat([wsb_df, institutional_df], ignore_index=True)
@@ -60,6 +64,11 @@ def fetch_all_sentiment_data(ticker: str, days: int):
     elif not institutional_df.empty:
         combined_df = institutional_df
     
+    # Parse timestamps and lowercase the text once here so cached results carry them into render_dashboard
+    if not combined_df.empty:
+        combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'], errors='coerce')
+        combined_df['_text_lower'] = combined_df['text'].str.lower()
+    
     print(f"Combined data: {len(combined_df)} rows")
     print(f"Sources present: {combined_df['source'].unique() if not combined_df.empty else 'None'}")
     
@@ -90,7 +99,7 @@ def main():
             return
         
         # Calculate combined sentiment score
-        sentiment_analyzer = SentimentAnalyzer()
+        sentiment_analyzer = get_sentiment_analyzer()
         combined_score = sentiment_analyzer.calculate_weighted_sentiment(combined_df)
         
         # Render dashboard
@@ -1,10 +1,35 @@
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import os
+import re
+import sys
+import hashlib
+import sqlite3
+import functools
 import torch
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Union
 from tqdm import tqdm
+from contextlib import closing
+
+# FinBERT scores are deterministic, so they are cached on disk by text hash across runs
+SCORE_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'finbert_scores.sqlite'
+)
 
 class SentimentAnalyzer:
+    # Number of texts sent through FinBERT per forward pass
+    batch_size = 32
+    
+    # Texts mentioning neither the ticker nor any of these terms are scored as neutral
+    # without running FinBERT
+    finance_keywords = (
+        'earnings', 'revenue', 'profit', 'loss', 'guidance', 'forecast', 'outlook',
+        'beat', 'miss', 'upgrade', 'downgrade', 'analyst', 'target', 'dividend',
+        'stock', 'stocks', 'shares', 'price', 'valuation', 'buy', 'sell', 'hold',
+        'calls', 'puts', 'bullish', 'bearish', 'rally', 'crash', 'growth'
+    )
+
     def __init__(self):
         # Load FinBERT model and tokenizer
         self.model_name = "ProsusAI/finbert"
@@ -15,32 +40,191 @@ class SentimentAnalyzer:
         # Move model to GPU if available
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model.to(self.device)
+        self.model.eval()
+        
+        # On CPU, quantize the linear layers to int8; on GPU, inference runs under BF16 autocast
+        self._eager_model = None
+        if self.device.type == 'cpu':
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        elif hasattr(torch, 'compile'):
+            # Fuse the GPU graph. The default mode avoids CUDA graphs, which would be re-recorded
+            # for every distinct (batch, seq_len) shape that length bucketing produces.
+            self._eager_model = self.model
+            self.model = torch.compile(self.model, dynamic=True)
+        
+        # Cached scores depend on the precision used, which differs between CPU and GPU
+        self.score_cache_variant = f"{self.model_name}:{self.device.type}"
+
+    def _autocast(self):
+        """Mixed-precision context for inference (BF16 on GPU, disabled on CPU)."""
+        return torch.autocast(
+            device_type=self.device.type,
+            dtype=torch.bfloat16,
+            enabled=self.device.type == 'cuda'
+        )
+    
+    def _to_device(self, inputs) -> Dict[str, torch.Tensor]:
+        """Move tokenizer output to the model device, overlapping the copy on GPU."""
+        if self.device.type == 'cuda':
+            return {k: v.pin_memory().to(self.device, non_blocking=True) for k, v in inputs.items()}
+        return {k: v.to(self.device) for k, v in inputs.items()}
+    
+    def _forward(self, inputs: Dict[str, torch.Tensor]):
+        """Run the model, falling back to the eager module if compilation fails."""
+        try:
+            return self.model(**inputs)
+        except Exception as e:
+            if self._eager_model is None:
+                raise
+            print(f"torch.compile failed, using the eager model instead: {e}")
+            self.model = self._eager_model
+            self._eager_model = None
+            return self.model(**inputs)
     
     def analyze_text(self, text: str) -> Dict[str, float]:
         """Analyze sentiment of a single text string."""
         inputs = self.tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        inputs = self._to_device(inputs)
         
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            scores = torch.softmax(outputs.logits, dim=1)
+        with torch.no_grad(), self._autocast():
+            outputs = self._forward(inputs)
+            scores = torch.softmax(outputs.logits.float(), dim=1)
         
         return {
             label: score.item()
             for label, score in zip(self.labels, scores[0])
         }
     
+    def _relevance_mask(self, texts: pd.Series, tickers: List[str]) -> np.ndarray:
+        """Flag texts that mention a ticker (or company name) or a finance keyword."""
+        terms = list(tickers) + list(self.finance_keywords)
+        pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(term) for term in terms) + r')\b',
+            re.IGNORECASE
+        )
+        return texts.str.contains(pattern).to_numpy(dtype=bool)
+    
+    def _text_keys(self, texts: List[str]) -> List[str]:
+        """Hash texts into score cache keys."""
+        return [hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest() for text in texts]
+    
+    def _connect_score_cache(self) -> sqlite3.Connection:
+        """Open the on-disk FinBERT score cache, creating it if needed."""
+        os.makedirs(os.path.dirname(SCORE_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(SCORE_CACHE_PATH)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "model TEXT, key TEXT, negative REAL, neutral REAL, positive REAL, "
+            "PRIMARY KEY (model, key))"
+        )
+        return conn
+    
+    def _load_cached_scores(self, keys: List[str]) -> Dict[str, tuple]:
+        """Look up previously computed scores for the given text keys."""
+        if not keys:
+            return {}
+        
+        cached = {}
+        try:
+            with closing(self._connect_score_cache()) as conn:
+                # Query in chunks to stay under SQLite's bound-parameter limit
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT key, negative, neutral, positive FROM scores "
+                        f"WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                        [self.score_cache_variant, *chunk]
+                    )
+                    cached.update((key, scores) for key, *scores in rows)
+        except sqlite3.Error as e:
+            print(f"Error reading sentiment score cache: {e}")
+        return cached
+    
+    def _store_scores(self, scores: Dict[str, np.ndarray]):
+        """Persist newly computed scores keyed by text hash."""
+        if not scores:
+            return
+        
+        try:
+            with closing(self._connect_score_cache()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                    [(self.score_cache_variant, key, *map(float, vec)) for key, vec in scores.items()]
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing sentiment score cache: {e}")
+    
     def analyze_dataframe(self, df: pd.DataFrame, text_column: str = 'text') -> pd.DataFrame:
         """Analyze sentiment for all texts in a DataFrame."""
-        results = []
+        texts = df[text_column].fillna('').astype(str)
+        results = np.empty((len(texts), len(self.labels)), dtype=np.float32)
+        
+        # Irrelevant texts skip the model and are marked fully neutral. Company names count
+        # as mentions too, since news queries match on them as well as on the ticker.
+        tickers = []
+        for column in ('ticker', 'company'):
+            if column in df.columns:
+                tickers.extend(df[column].dropna().astype(str).unique())
+        relevant = self._relevance_mask(texts, tickers)
+        results[~relevant] = [float(label == 'neutral') for label in self.labels]
+        
+        relevant_idx = np.flatnonzero(relevant)
+        relevant_texts = texts.iloc[relevant_idx].tolist()
+        
+        # Reuse scores from earlier runs; only uncached texts go through the model
+        keys = self._text_keys(relevant_texts)
+        cached_scores = self._load_cached_scores(keys)
+        pending = []
+        for j, key in enumerate(keys):
+            if key in cached_scores:
+                results[relevant_idx[j]] = cached_scores[key]
+            else:
+                pending.append(j)
+        
+        model_rows = relevant_idx[pending]
+        model_texts = [relevant_texts[j] for j in pending]
+        
+        # Sort by token length so each batch only pads to its own longest text
+        if model_texts:
+            encoded = self.tokenizer(model_texts, truncation=True, max_length=512)
+            lengths = [len(ids) for ids in encoded['input_ids']]
+            order = np.argsort(lengths, kind='stable')
+        else:
+            order = np.empty(0, dtype=np.intp)
         
-        for text in tqdm(df[text_column], desc='Analyzing sentiment'):
-            sentiment_scores = self.analyze_text(text)
-            results.append(sentiment_scores)
+        # Run the model on mini-batches instead of one text at a time
+        # Progress is only shown in a terminal (not when running under Streamlit)
+        batch_starts = tqdm(
+            range(0, len(order), self.batch_size),
+            desc='Analyzing sentiment',
+            disable=not sys.stderr.isatty(),
+            mininterval=0.5
+        )
+        for i in batch_starts:
+            batch = order[i:i + self.batch_size]
+            inputs = self.tokenizer(
+                [model_texts[j] for j in batch],
+                padding='longest',
+                truncation=True,
+                max_length=512,
+                return_tensors='pt'
+            )
+            inputs = self._to_device(inputs)
+            
+            with torch.inference_mode(), self._autocast():
+                outputs = self._forward(inputs)
+                scores = torch.softmax(outputs.logits.float(), dim=1)
+            
+            results[model_rows[batch]] = scores.cpu().numpy()
         
-        # Convert results to DataFrame columns
-        sentiment_df = pd.DataFrame(results)
-        return pd.concat([df, sentiment_df], axis=1)
+        self._store_scores({keys[j]: results[row] for j, row in zip(pending, model_rows)})
+        
+        # Write scores straight into the output columns
+        df = df.copy()
+        df[self.labels] = results
+        return df
     
     def get_combined_sentiment(self, scores: Dict[str, float]) -> str:
         """Get the dominant sentiment category."""
@@ -59,35 +243,30 @@ class SentimentAnalyzer:
         if df.empty:
             return 0.0
         
-        # Group by source and calculate average sentiment
-        source_sentiments = {}
-        
-        for source in df['source'].unique():
-            source_df = df[df['source'] == source]
-            # Calculate net sentiment (positive - negative)
-            source_sentiments[source] = source_df['positive'].mean() - source_df['negative'].mean()
+        # Net sentiment (positive - negative) per source in a single grouped pass
+        source_means = df.groupby('source')[['positive', 'negative']].mean()
+        source_sentiments = source_means['positive'] - source_means['negative']
         
         # Apply weights based on source
-        weights = {
+        weights = pd.Series({
             'Financial News': 0.7,  # Higher weight for professional sources
             'WallStreetBets': 0.3,  # Lower weight for social media
-        }
-        
-        # Calculate weighted average
-        total_weight = 0
-        weighted_sum = 0
-        
-        for source, sentiment in source_sentiments.items():
-            weight = weights.get(source, 0.5)  # Default weight if source not recognized
-            weighted_sum += sentiment * weight
-            total_weight += weight
+        }).reindex(source_sentiments.index).fillna(0.5)  # Default weight if source not recognized
         
         # Return weighted average, or 0 if no weights
-        return weighted_sum / total_weight if total_weight > 0 else 0.0
+        sentiments = source_sentiments.to_numpy(dtype=np.float64)
+        source_weights = weights.to_numpy(dtype=np.float64)
+        total_weight = source_weights.sum()
+        return float(np.dot(sentiments, source_weights) / total_weight) if total_weight > 0 else 0.0
+
+@functools.lru_cache(maxsize=1)
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    """Return the shared SentimentAnalyzer so FinBERT is only loaded once per process."""
+    return SentimentAnalyzer()
 
 def main():
     # Test the analyzer
-    analyzer = SentimentAnalyzer()
+    analyzer = get_sentiment_analyzer()
     test_text = "AAPL reported strong earnings, beating market expectations."
     sentiment = analyzer.analyze_text(test_text)
     print(f"Test text: {test_text}")
@@ -2,19 +2,48 @@ import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 import requests
 import os
+import re
 from dotenv import load_dotenv
 
 from data_fetching.fetch_institutional_sentiment import InstitutionalSentimentFetcher
 from data_fetching.fetch_wsb_sentiment import WSBSentimentFetcher
-from sentiment_analysis.sentiment_analysis import SentimentAnalyzer
-from typing import List
+from sentiment_analysis.sentiment_analysis import get_sentiment_analyzer
+from typing import Dict
+
+# Relevant financial terms and adjectives counted in the source statistics
+_FINANCIAL_TERMS = frozenset({
+    # Trading terms
+    'buy', 'sell', 'hold', 'call', 'put', 'long', 'short',
+    # Adjectives
+    'bullish', 'bearish', 'strong', 'weak', 'positive', 'negative',
+    'volatile', 'stable', 'risky', 'safe', 'overvalued', 'undervalued',
+    # Performance terms
+    'up', 'down', 'rising', 'falling', 'surging', 'plunging',
+    'outperform', 'underperform'
+})
+
+# Shared Plotly config for every chart: no mode bar, resize with the container
+_PLOTLY_CFG = {'displayModeBar': False, 'responsive': True, 'scrollZoom': False}
+
+# Shared colors so pie slices and trend lines match
+SENTIMENT_COLORS = {
+    'positive': '#2ca02c',
+    'neutral': '#7f7f7f',
+    'negative': '#d62728'
+}
 
 class SentimentDashboard:
+    # Matches any of the financial terms as a whole word
+    _FIN_RE = re.compile(r'\b(?:' + '|'.join(sorted(_FINANCIAL_TERMS)) + r')\b', re.IGNORECASE)
+    
     def __init__(self):
         st.set_page_config(page_title="Tech Stock Sentiment Analysis", layout="wide")
         self.setup_sidebar()
@@ -45,48 +74,65 @@ class SentimentDashboard:
         }
         return companies.get(ticker, ticker)
     
-    def plot_sentiment_over_time(self, df: pd.DataFrame, source: str):
-        """Create a line chart showing sentiment trends over time."""
-        source_df = df[df['source'] == source].copy()
-        if not source_df.empty:
-            fig = go.Figure()
-            
-            for sentiment in ['positive', 'neutral', 'negative']:
-                fig.add_trace(go.Scatter(
-                    x=source_df['timestamp'],
-                    y=source_df[sentiment],
-                    name=sentiment.capitalize(),
-                    mode='lines+markers'
-                ))
-            
-            fig.update_layout(
-                title=f"{source} Sentiment Over Time",
-                xaxis_title="Date",
-                yaxis_title="Sentiment Score",
-                height=400
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    def plot_sentiment_over_time(self, fig: go.Figure, source_df: pd.DataFrame, row: int, show_legend: bool = True):
+        """Add line traces showing one source's sentiment trends over time to a subplot row."""
+        for sentiment in ['positive', 'neutral', 'negative']:
+            fig.add_trace(go.Scattergl(
+                x=source_df['timestamp'],
+                y=source_df[sentiment],
+                name=sentiment.capitalize(),
+                mode='lines+markers',
+                marker_color=SENTIMENT_COLORS[sentiment],
+                legendgroup=sentiment,
+                showlegend=show_legend
+            ), row=row, col=1)
+        
+        fig.update_xaxes(title_text="Date", row=row, col=1)
+        fig.update_yaxes(title_text="Sentiment Score", row=row, col=1)
     
-    def plot_sentiment_distribution(self, df: pd.DataFrame):
-        """Create a pie chart showing overall sentiment distribution."""
-        if not df.empty:
-            avg_sentiments = {
-                'Positive': df['positive'].mean(),
-                'Neutral': df['neutral'].mean(),
-                'Negative': df['negative'].mean()
-            }
-            
-            fig = go.Figure(data=[go.Pie(
-                labels=list(avg_sentiments.keys()),
-                values=list(avg_sentiments.values()),
-                hole=.3
-            )])
-            
-            fig.update_layout(
-                title="Overall Sentiment Distribution",
-                height=400
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    def plot_sentiment_distribution(self, fig: go.Figure, df: pd.DataFrame, row: int = 1):
+        """Add a pie chart showing overall sentiment distribution to a subplot row."""
+        avg_sentiments = df[['positive', 'neutral', 'negative']].mean()
+        
+        fig.add_trace(go.Pie(
+            labels=['Positive', 'Neutral', 'Negative'],
+            values=avg_sentiments.values,
+            marker_colors=[SENTIMENT_COLORS[s] for s in avg_sentiments.index],
+            hole=.3,
+            textinfo='label+percent',
+            showlegend=False
+        ), row=row, col=1)
+    
+    def plot_sentiment_charts(self, df: pd.DataFrame, groups: Dict[str, pd.DataFrame]):
+        """Render the sentiment distribution and per-source trends as a single figure."""
+        if df.empty:
+            return
+        
+        # Each source's rows in time order, sources in a consistent order; only the
+        # plotted columns are sorted so the text columns are never copied
+        plot_columns = ['timestamp', 'positive', 'neutral', 'negative']
+        source_groups = [
+            (source, groups[source][plot_columns].sort_values('timestamp')) for source in sorted(groups)
+        ]
+        
+        fig = make_subplots(
+            rows=1 + len(source_groups),
+            cols=1,
+            subplot_titles=["Overall Sentiment Distribution"] + [
+                f"{source} Sentiment Over Time" for source, _ in source_groups
+            ],
+            specs=[[{'type': 'domain'}]] + [[{'type': 'xy'}]] * len(source_groups)
+        )
+        
+        self.plot_sentiment_distribution(fig, df, row=1)
+        for row, (source, source_df) in enumerate(source_groups, start=2):
+            self.plot_sentiment_over_time(fig, source_df, row, show_legend=row == 2)
+        
+        fig.update_layout(
+            height=400 * (1 + len(source_groups)),
+            uirevision='static'  # Keep zoom/pan state across reruns
+        )
+        st.plotly_chart(fig, use_container_width=True, config=_PLOTLY_CFG, theme=None)
     
     def display_sentiment_gauge(self, sentiment_score: float, title: str = "Sentiment Score"):
         """Create a gauge chart for sentiment score."""
@@ -107,58 +153,52 @@ class SentimentDashboard:
         ))
         
         fig.update_layout(height=300)
-        st.plotly_chart(fig, use_container_width=True)
-
-    def filter_financial_terms(self, words: List[str]) -> List[str]:
-        """Filter for relevant financial terms and adjectives."""
-        financial_terms = {
-            # Trading terms
-            'buy', 'sell', 'hold', 'call', 'put', 'long', 'short',
-            # Adjectives
-            'bullish', 'bearish', 'strong', 'weak', 'positive', 'negative',
-            'volatile', 'stable', 'risky', 'safe', 'overvalued', 'undervalued',
-            # Performance terms
-            'up', 'down', 'rising', 'falling', 'surging', 'plunging',
-            'outperform', 'underperform'
-        }
-        return [word for word in words if word.lower() in financial_terms]
+        st.plotly_chart(fig, use_container_width=True, config=_PLOTLY_CFG, theme=None)
 
     def render_dashboard(self, df: pd.DataFrame, combined_score: float):
         st.title(f"📊 {self.get_company_name(self.selected_ticker)} ({self.selected_ticker}) Sentiment Analysis")
         
+        # Split rows by source once; every section below reuses these groups
+        groups = {source: source_df for source, source_df in df.groupby('source', sort=False)}
+        
         # Source Statistics Section
         st.subheader("📊 Source Statistics")
         
+        # Top three trading terms per source, from a single pass over the text column
+        top_terms = {}
+        if 'text' in df.columns:
+            # Reuse the precomputed lowercase text when the caller provides it
+            text_lower = df['_text_lower'] if '_text_lower' in df.columns else df['text'].str.lower()
+            terms = pd.DataFrame({
+                'source': df['source'],
+                'term': text_lower.str.findall(self._FIN_RE)
+            }).explode('term').dropna()
+            top_terms = {
+                source: [term for term, _ in Counter(source_terms).most_common(3)]
+                for source, source_terms in terms.groupby('source')['term']
+            }
+        
         # Create two columns for source metrics
         col1, col2 = st.columns(2)
         
         # Financial News metrics
         with col1:
-            financial_df = df[df['source'] == 'Financial News']
+            financial_df = groups.get('Financial News', df.iloc[:0])
             st.metric("Financial News Sources", len(financial_df), "News Articles")
             if not financial_df.empty and 'text' in financial_df.columns:
-                words = ' '.join(financial_df['text'].str.lower()).split()
-                filtered_words = self.filter_financial_terms(words)
-                most_common = pd.Series(filtered_words).value_counts().nlargest(3)
-                st.caption(f"Top trading terms: {', '.join(most_common.index)}")
+                st.caption(f"Top trading terms: {', '.join(top_terms.get('Financial News', []))}")
         
         # WallStreetBets metrics
         with col2:
-            wsb_df = df[df['source'] == 'WallStreetBets']
+            wsb_df = groups.get('WallStreetBets', df.iloc[:0])
             st.metric("WallStreetBets Sources", len(wsb_df), "Reddit Posts")
             if not wsb_df.empty and 'text' in wsb_df.columns:
-                words = ' '.join(wsb_df['text'].str.lower()).split()
-                filtered_words = self.filter_financial_terms(words)
-                most_common = pd.Series(filtered_words).value_counts().nlargest(3)
-                st.caption(f"Top trading terms: {', '.join(most_common.index)}")
+                st.caption(f"Top trading terms: {', '.join(top_terms.get('WallStreetBets', []))}")
         
         # Overall metrics
         st.metric("Total Sources", len(df))
         st.metric("Days Analyzed", self.days_lookback)
         
-        # Get unique sources
-        sources = df['source'].unique()
-        
         # Display sentiment gauges
         st.subheader("🎯 Sentiment Scores")
         
@@ -169,12 +209,11 @@ class SentimentDashboard:
         
         # Individual source gauges
         st.markdown("### Source-Specific Sentiment")
-        sources = sorted(df['source'].unique())  # Sort sources for consistent order
+        sources = sorted(groups)  # Sort sources for consistent order
         
         # Optimized sentiment calculation
-        source_scores = df.groupby('source').apply(
-            lambda x: x['positive'].mean() - x['negative'].mean()
-        ).to_dict()
+        source_means = df.groupby('source', sort=False)[['positive', 'negative']].mean()
+        source_scores = (source_means['positive'] - source_means['negative']).to_dict()
         
         # Create columns for each source
         if sources:
@@ -187,50 +226,66 @@ class SentimentDashboard:
                         f"{source} Sentiment"
                     )
 
-        # Sentiment distribution
-        st.subheader("📊 Sentiment Distribution")
-        col1, col2 = st.columns(2)
-        with col1:
-            self.plot_sentiment_distribution(df)
-        
-        # Source-specific sentiment trends
-        st.subheader("📈 Sentiment Trends by Source")
-        for source in sources:
-            self.plot_sentiment_over_time(df, source)
+        # Sentiment distribution and source-specific trends, rendered as one figure
+        st.subheader("📈 Sentiment Distribution and Trends by Source")
+        self.plot_sentiment_charts(df, groups)
         
         # Remove the correlation analysis section completely
 
+# Cached loaders: widget changes rerun the script, but unchanged inputs reuse prior results.
+# Fetchers are built per call because a praw.Reddit client must not be shared across
+# session threads; cache_data already skips construction on a hit.
+@st.cache_data(ttl=600)
+def load_news(ticker: str, days: int) -> pd.DataFrame:
+    """Fetch institutional news for a ticker; scoring happens once in analyze()."""
+    return InstitutionalSentimentFetcher().fetch_institutional_news(ticker, days)
+
+@st.cache_data(ttl=600)
+def load_wsb(ticker: str, days: int) -> pd.DataFrame:
+    """Fetch WallStreetBets posts for a ticker."""
+    return WSBSentimentFetcher().fetch_wsb_posts(ticker, days)
+
+@st.cache_data(ttl=600)
+def analyze(df: pd.DataFrame) -> pd.DataFrame:
+    """Run sentiment analysis on a DataFrame of texts."""
+    return get_sentiment_analyzer().analyze_dataframe(df)
+
 def main():
     dashboard = SentimentDashboard()
-    sentiment_analyzer = SentimentAnalyzer()
     
     try:
-        # Initialize fetchers
-        news_fetcher = InstitutionalSentimentFetcher()
-        wsb_fetcher = WSBSentimentFetcher()
+        # Fetch raw data from both sources concurrently. Worker threads get this script run's
+        # context so the cached loaders can show spinners and warnings.
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(max_workers=2, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+            news_future = executor.submit(load_news, dashboard.selected_ticker, dashboard.days_lookback)
+            wsb_future = executor.submit(load_wsb, dashboard.selected_ticker, dashboard.days_lookback)
+            news_df = news_future.result()
+            wsb_raw_df = wsb_future.result()
         
-        # Fetch raw data
-        news_df = news_fetcher.get_institutional_sentiment(dashboard.selected_ticker, dashboard.days_lookback)
-        wsb_raw_df = wsb_fetcher.fetch_wsb_posts(dashboard.selected_ticker, dashboard.days_lookback)
+        # Stop before loading the model or combining anything if no source returned data
+        if news_df.empty and wsb_raw_df.empty:
+            st.error("No data available from any source for the selected period.")
+            return
         
-        # Process WallStreetBets data
-        wsb_df = pd.DataFrame()
-        if not wsb_raw_df.empty:
-            wsb_df = sentiment_analyzer.analyze_dataframe(wsb_raw_df)
-            wsb_df['source'] = 'WallStreetBets'
-
-        # Process News data
+        # Combine the non-empty sources so they go through the model in one batched call
+        raw_dfs = []
         if not news_df.empty:
-            news_df = sentiment_analyzer.analyze_dataframe(news_df)  # Ensure sentiment analysis is applied
-            news_df['source'] = 'Financial News'
-            
-        # Combine data
-        combined_df = pd.concat([news_df, wsb_df], ignore_index=True)
+            raw_dfs.append(news_df.assign(source='Financial News'))
+        if not wsb_raw_df.empty:
+            raw_dfs.append(wsb_raw_df.assign(source='WallStreetBets'))
+        combined_df = pd.concat(raw_dfs, ignore_index=True, copy=False)
+        
+        # Ensure sentiment analysis is applied
+        sentiment_analyzer = get_sentiment_analyzer()
+        combined_df = analyze(combined_df)
+        
+        # Parse timestamps once so plots receive a datetime64 column
+        combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'], errors='coerce')
+        
+        # Lowercase the text once for the term statistics in render_dashboard
+        combined_df['_text_lower'] = combined_df['text'].str.lower()
         
-        if combined_df.empty:
-            st.error("No data available from any source for the selected period.")
-            return
-            
         # Calculate weighted sentiment
         combined_score = sentiment_analyzer.calculate_weighted_sentiment(combined_df)
         